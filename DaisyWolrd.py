@@ -1,7 +1,12 @@
 import streamlit as st
 import numpy as np
+import pandas as pd
+import altair as alt
 import matplotlib.pyplot as plt
-import random
+import hashlib
+import threading
+
+from daisy_kernels import EMPTY, WHITE, BLACK
 
 st.set_page_config(layout="wide")
 
@@ -44,65 +49,117 @@ solar_luminosity = st.sidebar.slider("Solarkonstante", 0.5, 2.0, 1.0, 0.05)
 optimal_temp = st.sidebar.slider("Optimale Wachstumstemperatur (°C)", 5, 40, 22)
 reproduction_rate = st.sidebar.slider("Reproduktionsrate", 0.0, 1.0, 0.3, 0.05)
 death_rate = st.sidebar.slider("Sterberate", 0.0, 1.0, 0.1, 0.05)
+seed = 42
 
-colors = {"white": 1, "black": 0, "empty": 0.5}
-daisy_types = {"white": albedo_white, "black": albedo_black, "empty": albedo_empty}
+code_to_color = np.array([0.5, 1.0, 0.0], dtype=np.float32)
+albedo_lut = np.array([albedo_empty, albedo_white, albedo_black], dtype=np.float32)
 
-def initialize_grid(size):
-    return np.random.choice(
-        ["white", "black", "empty"],
-        size=(size, size),
-        p=[white_frac, black_frac, empty_frac]
-    )
+@st.cache_resource
+def get_kernels():
+    from daisy_kernels import update
+    try:
+        from daisy_update import update as cy_update
+    except ImportError:
+        cy_update = None
+    return update, cy_update
 
-def calculate_temperature(grid):
-    albedo_grid = np.vectorize(lambda x: daisy_types[x])(grid)
-    global_albedo = np.mean(albedo_grid)
-    return solar_luminosity * (1 - global_albedo) * (2 * optimal_temp)
 
+@st.cache_resource
+def get_figures():
+    fig, ax = plt.subplots(figsize=(6, 6))
+    im = ax.imshow(np.zeros((1, 1)), cmap="gray", vmin=0, vmax=1)
+    ax.axis("off")
 
-def update_daisies(grid, temperature):
-    new_grid = grid.copy()
-    for i in range(grid.shape[0]):
-        for j in range(grid.shape[1]):
-            if grid[i, j] == "empty":
-                if random.random() < reproduction_rate * (1 - abs(temperature - optimal_temp) / optimal_temp):
-                    new_grid[i, j] = random.choice(["white", "black"])
-            elif grid[i, j] in ["white", "black"]:
-                if random.random() < death_rate * abs(temperature - optimal_temp) / optimal_temp:
-                    new_grid[i, j] = "empty"
-    return new_grid
+    # The figure is shared by all sessions, so mutate and render it under a lock.
+    # "params" records which simulation the image currently holds.
+    return {
+        "lock": threading.Lock(),
+        "params": None,
+        "fig_grid": fig,
+        "im": im,
+    }
+
+def initialize_grid(size, rng):
+    # Codes are ordered EMPTY, WHITE, BLACK, so the two inner cumulative
+    # boundaries map a uniform draw straight to its cell code.
+    bounds = np.cumsum([empty_frac, white_frac])
+    return np.searchsorted(bounds, rng.random((size, size)), side="right").astype(np.int8)
+
+def calculate_temperature(counts):
+    global_albedo = float(counts @ albedo_lut) / counts.sum()
+    return solar_luminosity * (1 - global_albedo) * (2 * optimal_temp)
 
 
-def simulate_daisyworld(grid, steps):
-    grids = []
+def update_daisies(grid, new_grid, temperature, r, colors, born_buf, died_buf, counts):
+    dev = abs(temperature - optimal_temp) / optimal_temp
+    update, cy_update = get_kernels()
+    if cy_update is not None:
+        cy_update(grid, new_grid, r, colors, dev, reproduction_rate, death_rate, counts)
+        return
+    if grid.size > 10000:
+        update(grid, new_grid, r, colors, dev, reproduction_rate, death_rate, counts)
+        return
+
+    birth_p = np.float64(reproduction_rate * (1 - dev))
+    death_p = np.float64(death_rate * dev)
+    np.copyto(new_grid, grid)
+    np.equal(grid, EMPTY, out=born_buf)
+    np.logical_not(born_buf, out=died_buf)
+    np.less(r, birth_p, out=born_buf, where=born_buf)
+    np.less(r, death_p, out=died_buf, where=died_buf)
+    np.copyto(new_grid, colors, where=born_buf)
+    np.copyto(new_grid, EMPTY, where=died_buf)
+    counts[:] = np.bincount(new_grid.ravel(), minlength=3)
+
+
+def simulate_daisyworld(grid, steps, rng):
+    grid_history = np.empty((steps, *grid.shape), dtype=np.int8)
     temperatures = []
     populations = {"white": [], "black": [], "empty": []}
 
-    for _ in range(steps):
-        temp = calculate_temperature(grid)
+    R = rng.random((steps - 1, *grid.shape), dtype=np.float32)
+    C = rng.integers(WHITE, BLACK + 1, size=(steps - 1, *grid.shape), dtype=np.int8)
+    born_buf = np.empty(grid.shape, dtype=bool)
+    died_buf = np.empty(grid.shape, dtype=bool)
+    counts = np.bincount(grid.ravel(), minlength=3).astype(np.int64)
+
+    # Each step is updated straight into the next history row, so the history
+    # doubles as the ping-pong buffers and no separate grid copy is made.
+    grid_history[0] = grid
+    for t in range(steps):
+        temp = calculate_temperature(counts)
         temperatures.append(temp)
-        populations["white"].append(np.sum(grid == "white"))
-        populations["black"].append(np.sum(grid == "black"))
-        populations["empty"].append(np.sum(grid == "empty"))
-        grids.append(grid.copy())
-        grid = update_daisies(grid, temp)
-
-    return grids, temperatures, populations
-
-if "last_params" not in st.session_state or st.session_state.last_params != (
-    grid_size, steps, white_frac, black_frac, albedo_white, albedo_black,
-    albedo_empty, solar_luminosity, optimal_temp, reproduction_rate, death_rate
-):
-    initial_grid = initialize_grid(grid_size)
-    simulation = simulate_daisyworld(initial_grid, steps)
-    st.session_state.simulation_data = simulation
-    st.session_state.last_params = (
-        grid_size, steps, white_frac, black_frac, albedo_white, albedo_black,
-        albedo_empty, solar_luminosity, optimal_temp, reproduction_rate, death_rate
-    )
-
-grids, temperatures, populations = st.session_state.simulation_data
+        populations["empty"].append(counts[EMPTY])
+        populations["white"].append(counts[WHITE])
+        populations["black"].append(counts[BLACK])
+        if t + 1 < steps:
+            update_daisies(grid_history[t], grid_history[t + 1], temp, R[t], C[t], born_buf, died_buf, counts)
+
+    return grid_history, temperatures, populations
+
+# Every sidebar setting reruns _run_grid: the albedos and the solar constant reach
+# the trajectory through the temperature, which drives births and deaths. The
+# timestep slider reruns nothing. _render is keyed on a digest of the grid history
+# itself, so it only recomputes when the trajectory actually differs. The array is
+# passed unhashed (leading underscore) because Streamlit only samples large arrays.
+@st.cache_data(max_entries=8)
+def _run_grid(seed, grid_size, steps, white_frac, black_frac, reproduction_rate, death_rate,
+              optimal_temp, solar_luminosity, albedo):
+    rng = np.random.default_rng(seed)
+    initial_grid = initialize_grid(grid_size, rng)
+    return simulate_daisyworld(initial_grid, steps, rng)
+
+
+@st.cache_data(max_entries=8)
+def _render(digest, _grid_history):
+    return code_to_color[_grid_history]
+
+params = (
+    seed, grid_size, steps, white_frac, black_frac, reproduction_rate, death_rate,
+    optimal_temp, solar_luminosity, (albedo_white, albedo_black, albedo_empty)
+)
+grid_history, temperatures, populations = _run_grid(*params)
+images = _render(hashlib.blake2b(grid_history, digest_size=16).hexdigest(), grid_history)
 
 step = st.slider("Timestep auswählen", 0, steps - 1, 0, key="timestep_slider")
 
@@ -110,30 +167,50 @@ col1, col2 = st.columns([1, 1.5])
 
 with col1:
     st.subheader(f"Daisy-Verteilung – Schritt {step}")
-    image = np.vectorize(lambda x: colors[x])(grids[step])
-    fig, ax = plt.subplots(figsize=(6, 6))
-    ax.imshow(image, cmap="gray", vmin=0, vmax=1)
-    ax.axis("off")
-    st.pyplot(fig)
+    img_ph = st.empty()
     st.metric("Temperatur", f"{temperatures[step]:.2f} °C")
 
 with col2:
     st.subheader("Populationsentwicklung & Temperatur")
-    fig2, ax2 = plt.subplots(figsize=(10, 4))
-    ax2.plot(populations["white"], label="White", color="skyblue")
-    ax2.plot(populations["black"], label="Black", color="black")
-    ax2.plot(populations["empty"], label="Empty", color="green")
-    ax2.axvline(x=step, color="orange", linestyle="--", linewidth=2, label="Aktueller Schritt")
-    ax2.set_xlabel("Timestep")
-    ax2.set_ylabel("Anzahl Daisies")
-    ax2.legend(loc="upper left")
-
-    ax_temp = ax2.twinx()
-    ax_temp.plot(temperatures, label="Temperatur", color="red", linestyle="--")
-    ax_temp.set_ylabel("Temperatur (°C)", color="red")
-
-    ax2.set_title("Populationsentwicklung & Temperatur")
-    st.pyplot(fig2)
+    plot_ph = st.empty()
+
+figs = get_figures()
+with figs["lock"]:
+    # The extent only changes with the simulation; a new step just swaps the image data.
+    if figs["params"] != params:
+        figs["im"].set_extent((-0.5, grid_size - 0.5, grid_size - 0.5, -0.5))
+        figs["params"] = params
+    figs["im"].set_data(images[step])
+    img_ph.pyplot(figs["fig_grid"])
+
+df = pd.DataFrame({
+    "Timestep": np.arange(steps),
+    "White": populations["white"],
+    "Black": populations["black"],
+    "Empty": populations["empty"],
+    "Temperatur": temperatures,
+})
+pop_chart = alt.Chart(df).transform_fold(["White", "Black", "Empty"], as_=["Typ", "Anzahl"]).mark_line().encode(
+    x="Timestep:Q",
+    y=alt.Y("Anzahl:Q", title="Anzahl Daisies"),
+    color=alt.Color(
+        "Typ:N",
+        scale=alt.Scale(domain=["White", "Black", "Empty"], range=["skyblue", "black", "green"]),
+        legend=alt.Legend(orient="top-left", title=None),
+    ),
+)
+temp_chart = alt.Chart(df).mark_line(color="red", strokeDash=[6, 4]).encode(
+    x="Timestep:Q",
+    y=alt.Y("Temperatur:Q", title="Temperatur (°C)", axis=alt.Axis(orient="right", titleColor="red")),
+)
+step_rule = alt.Chart(pd.DataFrame({"Timestep": [step]})).mark_rule(color="orange", strokeDash=[6, 4], size=2).encode(
+    x="Timestep:Q",
+)
+plot_ph.altair_chart(
+    alt.layer(pop_chart, temp_chart, step_rule)
+    .resolve_scale(y="independent")
+    .properties(title="Populationsentwicklung & Temperatur", height=400)
+)
 
 st.markdown("### Berechnungen")
 st.markdown("""
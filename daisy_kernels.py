@@ -0,0 +1,35 @@
+import threading
+
+from numba import njit, prange
+
+EMPTY, WHITE, BLACK = 0, 1, 2
+
+# Numba's default workqueue threading layer must not be entered from two
+# threads at once, and Streamlit runs every session in its own thread.
+_lock = threading.Lock()
+
+
+@njit(parallel=True, cache=True, fastmath=True)
+def _update(grid, new_grid, r, colors, dev, repro, death):
+    birth_p = repro * (1 - dev)
+    death_p = death * dev
+    n_empty = 0
+    n_white = 0
+    n_black = 0
+    for i in prange(grid.shape[0]):
+        for j in range(grid.shape[1]):
+            cell = grid[i, j]
+            if cell == EMPTY and r[i, j] < birth_p:
+                cell = colors[i, j]
+            elif cell != EMPTY and r[i, j] < death_p:
+                cell = EMPTY
+            new_grid[i, j] = cell
+            n_empty += cell == EMPTY
+            n_white += cell == WHITE
+            n_black += cell == BLACK
+    return n_empty, n_white, n_black
+
+
+def update(grid, new_grid, r, colors, dev, repro, death, counts):
+    with _lock:
+        counts[:] = _update(grid, new_grid, r, colors, dev, repro, death)
@@ -0,0 +1,27 @@
+# cython: language_level=3, boundscheck=False, wraparound=False, initializedcheck=False
+from libc.stdint cimport int8_t, int64_t
+
+cdef enum:
+    EMPTY = 0
+    WHITE = 1
+    BLACK = 2
+
+
+def update(const int8_t[:, ::1] g, int8_t[:, ::1] out, const float[:, ::1] r, const int8_t[:, ::1] colors,
+           double dev, double repro, double death, int64_t[::1] counts):
+    cdef Py_ssize_t i, j
+    cdef int8_t cell
+    cdef double birth_p = repro * (1 - dev)
+    cdef double death_p = death * dev
+
+    with nogil:
+        counts[EMPTY] = counts[WHITE] = counts[BLACK] = 0
+        for i in range(g.shape[0]):
+            for j in range(g.shape[1]):
+                cell = g[i, j]
+                if cell == EMPTY and r[i, j] < birth_p:
+                    cell = colors[i, j]
+                elif cell != EMPTY and r[i, j] < death_p:
+                    cell = EMPTY
+                out[i, j] = cell
+                counts[cell] += 1
@@ -0,0 +1,8 @@
+from Cython.Build import cythonize
+from setuptools import Extension, setup
+
+# Optional compiled kernels: python setup.py build_ext --inplace
+setup(
+    name="daisyworld-kernels",
+    ext_modules=cythonize([Extension("daisy_update", ["daisy_update.pyx"])]),
+)